@@ -1,28 +1,58 @@
-from fastapi import FastAPI, BackgroundTasks, HTTPException
+from fastapi import FastAPI, HTTPException
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
 from fastapi.responses import FileResponse, Response
 import threading
 from pydantic import BaseModel
+from typing import Optional
 import uuid
 import os
 import json
 
-from .services.pipeline import run_full_pipeline
+from .services.job_queue import JobQueue
+from .services.pipeline import request_full_render, clip_render_state
+from .worker import run_worker
+from .services.encoding_profiles import PROFILES, ADAPTIVE, DEFAULT_PROFILE
 import urllib.request
 from urllib.parse import urlparse, unquote
 
 
 app = FastAPI(title="AI Auto Short Clip - Demo")
+_queue = JobQueue()
+_stop_workers = threading.Event()
+
+
+@app.on_event("startup")
+def _start_embedded_workers():
+    # CLIP_EMBEDDED_WORKERS=N also runs N workers inside the API process (single-process demo)
+    for _ in range(int(os.environ.get("CLIP_EMBEDDED_WORKERS", "0"))):
+        threading.Thread(target=run_worker, args=(_queue,), kwargs={"stop": _stop_workers}, daemon=True).start()
+
+
+@app.on_event("shutdown")
+def _stop_embedded_workers():
+    _stop_workers.set()
 
 
 class ProcessRequest(BaseModel):
     video_url: str
     platform: str = "auto"
+    # render full-quality clips right away instead of drafts only
+    full_render: bool = False
+    # named profile from encoding_profiles.PROFILES, or "adaptive"
+    encoding_profile: str = DEFAULT_PROFILE
+    # per-job latency SLO (seconds); the adaptive profile splits it across the job's encodes
+    latency_slo: Optional[float] = None
+
+
+def _check_encoding_profile(name: Optional[str]):
+    if name and name != ADAPTIVE and name not in PROFILES:
+        raise HTTPException(status_code=400, detail=f"unknown encoding profile: {name}")
 
 
 @app.post("/process-by-url")
-async def process_by_url(req: ProcessRequest, background_tasks: BackgroundTasks):
+def process_by_url(req: ProcessRequest):
+    _check_encoding_profile(req.encoding_profile)
     job_id = str(uuid.uuid4())
     # ensure storage folders exist
     os.makedirs("storage/raw_videos", exist_ok=True)
@@ -32,20 +62,26 @@ async def process_by_url(req: ProcessRequest, background_tasks: BackgroundTasks)
     os.makedirs("storage/transcripts", exist_ok=True)
     os.makedirs("storage/final_clips", exist_ok=True)
 
-    # run the long-running pipeline in a separate daemon thread to avoid
-    # blocking the uvicorn worker or causing unexpected shutdowns
-    def _start():
-        try:
-            run_full_pipeline(req.video_url, job_id)
-        except Exception:
-            # don't let exceptions in pipeline crash the web process
-            import traceback
-            traceback.print_exc()
-
-    background_tasks.add_task(lambda: threading.Thread(target=_start, daemon=True).start())
+    # heavy work runs in worker processes (run_worker.py) pulling from the shared queue
+    _queue.enqueue(
+        "process",
+        {
+            "job_id": job_id,
+            "video_url": req.video_url,
+            "full_render": req.full_render,
+            "encoding_profile": req.encoding_profile,
+            "latency_slo": req.latency_slo,
+        },
+        job_id=job_id,
+    )
     return {"video_id": job_id, "status": "queued"}
 
 
+@app.get("/encoding-profiles")
+def list_encoding_profiles():
+    return {"default": DEFAULT_PROFILE, "profiles": PROFILES, "adaptive": ADAPTIVE}
+
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
@@ -66,7 +102,13 @@ app.mount("/storage", StaticFiles(directory="storage"), name="storage")
 @app.get("/status/{video_id}")
 def get_status(video_id: str):
     status_path = os.path.join("storage", "transcripts", f"{video_id}_status.json")
+    job = _queue.get(video_id)
+    if job and job["status"] == "failed":
+        # out of attempts; the status file may still show a retry or a stage
+        # whose worker died
+        return JSONResponse({"video_id": video_id, "status": "error", "error": job.get("error")})
     if not os.path.exists(status_path):
+        # not picked up by a worker yet
         return JSONResponse({"video_id": video_id, "status": "queued"})
     try:
         with open(status_path, "r", encoding="utf-8") as f:
@@ -92,17 +134,37 @@ def list_clips(video_id: str):
             for i, m in enumerate(meta, start=1):
                 vertical = m.get("vertical")
                 burned = m.get("burned")
+                draft = m.get("draft")
                 filename = None
+                quality = "full"
                 if vertical and os.path.exists(vertical):
                     filename = os.path.relpath(vertical, "storage")
                 elif burned and os.path.exists(burned):
                     filename = os.path.relpath(burned, "storage")
-                else:
+                elif draft and os.path.exists(draft):
+                    filename = os.path.relpath(draft, "storage")
+                    quality = "draft"
+                elif "render" not in m:
+                    # legacy metadata without draft/render state: any file in the clip dir
                     files = os.listdir(final_dir)
                     if files:
                         filename = os.path.join(video_id, files[0])
                 if filename:
-                    clips.append({"id": i, "url": f"/storage/{filename.replace('\\', '/')}", "meta": m.get("clip", {})})
+                    url = "/storage/" + filename.replace("\\", "/")
+                elif "render" in m:
+                    # no playable file yet (e.g. the draft render failed): still list
+                    # the clip so its full render can be requested
+                    url = None
+                    quality = "none"
+                else:
+                    continue
+                clips.append({
+                    "id": i,
+                    "url": url,
+                    "quality": quality,
+                    "render": clip_render_state(m, _queue),
+                    "meta": m.get("clip", {}),
+                })
         except Exception:
             pass
     else:
@@ -112,6 +174,24 @@ def list_clips(video_id: str):
     return JSONResponse({"video_id": video_id, "clips": clips})
 
 
+@app.post("/clips/{video_id}/{clip_id}/render")
+def render_clip(video_id: str, clip_id: int, encoding_profile: Optional[str] = None, latency_slo: Optional[float] = None):
+    """Trigger the full-quality render of a single draft clip the user keeps."""
+    _check_encoding_profile(encoding_profile)
+    clips_meta = os.path.join("storage", "transcripts", f"{video_id}_clips.json")
+    if not os.path.exists(clips_meta):
+        raise HTTPException(status_code=404, detail="clips not found")
+    payload = {"video_id": video_id, "clip_id": clip_id, "encoding_profile": encoding_profile, "latency_slo": latency_slo}
+    try:
+        state = request_full_render(video_id, clip_id, _queue, payload)
+    except IndexError:
+        raise HTTPException(status_code=404, detail="clip not found")
+    if state not in ("draft", "error"):
+        # already queued, rendering or rendered
+        return {"video_id": video_id, "clip_id": clip_id, "render": state}
+    return {"video_id": video_id, "clip_id": clip_id, "render": "queued"}
+
+
 @app.get('/proxy-thumbnail')
 def proxy_thumbnail(url: str):
     # simple proxy for provider thumbnails to avoid CORS and allow client-side processing
@@ -1,7 +1,8 @@
-import subprocess
 import os
 from imageio_ffmpeg import get_ffmpeg_exe
 
+from .cancellation import run_cancellable
+
 
 def extract_audio(video_path: str, out_wav: str, rate: int = 16000):
     """Extract audio as mono WAV with given sample rate using ffmpeg."""
@@ -18,4 +19,4 @@ def extract_audio(video_path: str, out_wav: str, rate: int = 16000):
         "1",
         out_wav,
     ]
-    subprocess.check_call(cmd)
+    run_cancellable(cmd)
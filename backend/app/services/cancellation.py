@@ -0,0 +1,68 @@
+import subprocess
+import threading
+from contextlib import contextmanager
+from typing import List, Optional
+
+_local = threading.local()
+
+
+class JobCancelled(BaseException):
+    """Raised inside a job once its worker has lost the job's lease.
+
+    Derives from BaseException so the pipeline's `except Exception` fallbacks
+    don't swallow it and keep writing files another worker now owns.
+    """
+
+
+@contextmanager
+def cancel_scope(event: Optional[threading.Event]):
+    """Run the enclosed job code in this thread as cancelled once `event` is set.
+
+    Scopes are per thread: a job that starts helper threads passes them
+    current_cancel_event() so they re-enter the scope.
+    """
+    prev = getattr(_local, "event", None)
+    _local.event = event
+    try:
+        yield
+    finally:
+        _local.event = prev
+
+
+def current_cancel_event() -> Optional[threading.Event]:
+    return getattr(_local, "event", None)
+
+
+def cancelled() -> bool:
+    event = getattr(_local, "event", None)
+    return event is not None and event.is_set()
+
+
+def check_cancelled():
+    if cancelled():
+        raise JobCancelled()
+
+
+def run_cancellable(cmd: List[str], cwd: str = None, poll_interval: float = 0.5, stdout=None):
+    """subprocess.check_call that kills the process if the current job gets cancelled.
+
+    `stdout` is passed to the process as is; use a file rather than a pipe for
+    large output, since nothing reads a pipe while the process runs.
+    """
+    check_cancelled()
+    event = getattr(_local, "event", None)
+    if event is None:
+        subprocess.check_call(cmd, cwd=cwd, stdout=stdout)
+        return
+    proc = subprocess.Popen(cmd, cwd=cwd, stdout=stdout)
+    while True:
+        try:
+            rc = proc.wait(timeout=poll_interval)
+            break
+        except subprocess.TimeoutExpired:
+            if event.is_set():
+                proc.kill()
+                proc.wait()
+                raise JobCancelled()
+    if rc:
+        raise subprocess.CalledProcessError(rc, cmd)
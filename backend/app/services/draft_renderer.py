@@ -0,0 +1,46 @@
+import os
+from typing import Dict
+from imageio_ffmpeg import get_ffmpeg_exe
+
+from .encoding_profiles import get_profile, x264_args, run_encode
+from .subtitle_burner import subtitles_filter
+
+
+def render_draft(input_video: str, start: float, duration: float, srt_path: str, out_video: str,
+                 width: int = 360, height: int = 640, profile: Dict = None):
+    """Render a low-resolution vertical preview of one clip in a single ffmpeg pass.
+
+    Seeks, cuts, scales/center-crops to width x height and burns `srt_path`
+    (already shifted so the clip starts at 0) with the `draft` profile, so
+    every candidate clip can be previewed long before a full-quality render.
+    """
+    os.makedirs(os.path.dirname(out_video), exist_ok=True)
+    profile = profile or get_profile("draft")
+    ffmpeg = get_ffmpeg_exe()
+    work_dir = os.path.dirname(os.path.abspath(out_video)) or "."
+
+    vf = f"scale={width}:{height}:force_original_aspect_ratio=increase,crop={width}:{height},setsar=1"
+    if srt_path and os.path.exists(srt_path):
+        vf = f"{vf},{subtitles_filter(srt_path, work_dir)}"
+
+    cmd = [
+        ffmpeg,
+        "-y",
+        # input seeking: fast, and output timestamps start at 0 to match the clip SRT
+        "-ss",
+        str(start),
+        "-i",
+        os.path.abspath(input_video),
+        "-t",
+        str(duration),
+        "-vf",
+        vf,
+        *x264_args(profile),
+        "-c:a",
+        "aac",
+        "-b:a",
+        "64k",
+        os.path.abspath(out_video),
+    ]
+    # low-res ultrafast drafts would skew the throughput stats used for full renders
+    run_encode(cmd, profile, cwd=work_dir, record=False)
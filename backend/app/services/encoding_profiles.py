@@ -0,0 +1,217 @@
+import json
+import math
+import os
+import re
+import socket
+import subprocess
+import time
+from typing import Dict, List, Optional
+from imageio_ffmpeg import get_ffmpeg_exe
+
+from .cancellation import run_cancellable
+from .file_lock import file_lock, write_json_atomic
+
+# Named libx264 profiles. `threads` 0 lets x264 pick; `tune` None omits -tune.
+PROFILES: Dict[str, Dict] = {
+    "quality": {"preset": "slow", "crf": 19, "tune": None, "threads": 0},
+    "balanced": {"preset": "medium", "crf": 21, "tune": None, "threads": 0},
+    "fast": {"preset": "fast", "crf": 23, "tune": None, "threads": 0},
+    "speed": {"preset": "veryfast", "crf": 24, "tune": None, "threads": 0},
+    "draft": {"preset": "ultrafast", "crf": 30, "tune": None, "threads": 0},
+}
+DEFAULT_PROFILE = "fast"
+ADAPTIVE = "adaptive"
+# per-job latency SLO (seconds) when the job doesn't set one
+DEFAULT_LATENCY_SLO = 600.0
+# 9:16 output of format_vertical
+VERTICAL_PIXELS = 1080 * 1920
+# pixels per frame assumed when the caller doesn't know the output size
+FULL_HD_PIXELS = 1920 * 1080
+
+# Rough x264 throughput relative to `medium`, used to extrapolate presets that
+# have no recent measurement from ones that do.
+PRESET_SPEED = {
+    "ultrafast": 4.0,
+    "superfast": 3.0,
+    "veryfast": 2.5,
+    "faster": 1.8,
+    "fast": 1.4,
+    "medium": 1.0,
+    "slow": 0.6,
+    "slower": 0.3,
+    "veryslow": 0.15,
+}
+
+# Encode speed stats: pixel throughput (output pixels x media seconds per wall
+# second, EWMA per preset) so encodes of different output sizes are comparable.
+# One file per host: storage/ may be shared by workers on machines of different speed.
+STATS_PATH = os.path.join("storage", "encode_stats", re.sub(r"[^\w.-]", "_", socket.gethostname()) + ".json")
+STATS_ALPHA = 0.3
+STATS_MAX_AGE = 900.0
+
+
+def get_profile(name: Optional[str] = None) -> Dict:
+    """Return a copy of the named profile (default profile when `name` is empty)."""
+    name = name or DEFAULT_PROFILE
+    if name not in PROFILES:
+        raise ValueError(f"unknown encoding profile: {name}")
+    profile = dict(PROFILES[name])
+    profile["name"] = name
+    return profile
+
+
+def x264_args(profile: Optional[Dict] = None) -> List[str]:
+    """ffmpeg video codec arguments for `profile` (default profile when None)."""
+    profile = profile or get_profile()
+    args = ["-c:v", "libx264", "-preset", profile["preset"]]
+    if profile.get("crf") is not None:
+        args += ["-crf", str(profile["crf"])]
+    if profile.get("tune"):
+        args += ["-tune", profile["tune"]]
+    if profile.get("threads") is not None:
+        args += ["-threads", str(profile["threads"])]
+    return args
+
+
+def probe_duration(path: str) -> Optional[float]:
+    """Read the container duration from ffmpeg's header dump (no decoding)."""
+    try:
+        proc = subprocess.run([get_ffmpeg_exe(), "-i", path], capture_output=True, text=True, errors="replace")
+    except Exception:
+        return None
+    m = re.search(r"Duration:\s*(\d+):(\d+):(\d+(?:\.\d+)?)", proc.stderr or "")
+    if not m:
+        return None
+    return int(m.group(1)) * 3600 + int(m.group(2)) * 60 + float(m.group(3))
+
+
+def probe_size(path: str) -> Optional[tuple]:
+    """Read the first video stream's (width, height) from ffmpeg's header dump."""
+    try:
+        proc = subprocess.run([get_ffmpeg_exe(), "-i", path], capture_output=True, text=True, errors="replace")
+    except Exception:
+        return None
+    m = re.search(r"Video:.*?(\d{2,5})x(\d{2,5})", proc.stderr or "")
+    if not m:
+        return None
+    return int(m.group(1)), int(m.group(2))
+
+
+def probe_pixels(path: str) -> Optional[int]:
+    size = probe_size(path)
+    return size[0] * size[1] if size else None
+
+
+def _read_stats() -> Dict:
+    try:
+        with open(STATS_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def record_encode(preset: str, media_seconds: float, wall_seconds: float, pixels: int):
+    """Fold one finished encode (`pixels` per output frame) into this host's per-preset speed average."""
+    if not media_seconds or not pixels or wall_seconds <= 0:
+        return
+    speed = media_seconds * pixels / wall_seconds
+    try:
+        # workers on this host share the file: lock so no EWMA update is lost
+        with file_lock(STATS_PATH):
+            stats = _read_stats()
+            prev = stats.get(preset)
+            if prev and "px_speed" in prev and time.time() - prev.get("updated", 0) <= STATS_MAX_AGE:
+                speed = STATS_ALPHA * speed + (1 - STATS_ALPHA) * prev["px_speed"]
+            stats[preset] = {"px_speed": speed, "updated": time.time()}
+            write_json_atomic(STATS_PATH, stats)
+    except OSError as e:
+        # the encode itself succeeded; losing one sample only affects adaptive estimates
+        print(f"encode stats not saved to {STATS_PATH}: {e}")
+
+
+def encode_speed(preset: str) -> Optional[float]:
+    """Recent pixel throughput (pixel-seconds per wall second) for `preset` on this host.
+
+    Uses the preset's own measurement when fresh, otherwise extrapolates from the
+    measured preset nearest in PRESET_SPEED, capped at the measured speed of any
+    faster preset. None if nothing is fresh.
+    """
+    now = time.time()
+    fresh = {
+        p: s for p, s in _read_stats().items()
+        if "px_speed" in s and p in PRESET_SPEED and now - s.get("updated", 0) <= STATS_MAX_AGE
+    }
+    if preset in fresh:
+        return fresh[preset]["px_speed"]
+    if not fresh or preset not in PRESET_SPEED:
+        return None
+    # extrapolate from the measured preset closest in nominal speed
+    ref = min(fresh, key=lambda p: (abs(math.log(PRESET_SPEED[p] / PRESET_SPEED[preset])), -fresh[p]["updated"]))
+    ref_speed = fresh[ref]["px_speed"]
+    estimate = ref_speed * PRESET_SPEED[preset] / PRESET_SPEED[ref]
+    # a slower preset can never be estimated faster than a faster one actually ran
+    faster = [s["px_speed"] for p, s in fresh.items() if PRESET_SPEED[p] >= PRESET_SPEED[preset]]
+    return min([estimate] + faster)
+
+
+def choose_adaptive_profile(work: float, budget_seconds: float) -> Dict:
+    """Pick the slowest profile whose estimated encode time fits `budget_seconds`.
+
+    `work` is in pixel-seconds (media seconds x output pixels per frame). Falls
+    back to the default profile when there are no recent measurements and to
+    the fastest profile when nothing fits.
+    """
+    ladder = sorted(PROFILES, key=lambda n: PRESET_SPEED.get(PROFILES[n]["preset"], 1.0))
+    estimates = [(n, encode_speed(PROFILES[n]["preset"])) for n in ladder]
+    if all(speed is None for _, speed in estimates):
+        return get_profile(DEFAULT_PROFILE)
+    for name, speed in estimates:
+        if speed and work / speed <= budget_seconds:
+            return get_profile(name)
+    return get_profile(ladder[-1])
+
+
+def resolve_profile(name: Optional[str], media_seconds: Optional[float] = None,
+                    budget_seconds: Optional[float] = None, pixels: Optional[int] = None) -> Dict:
+    """Resolve a profile name; `adaptive` picks one for `media_seconds` of `pixels`-sized
+    output that should finish within `budget_seconds` (see EncodeBudget)."""
+    if name != ADAPTIVE:
+        return get_profile(name)
+    if not media_seconds:
+        return get_profile(DEFAULT_PROFILE)
+    if budget_seconds is None:
+        budget_seconds = DEFAULT_LATENCY_SLO
+    return choose_adaptive_profile(media_seconds * (pixels or FULL_HD_PIXELS), budget_seconds)
+
+
+class EncodeBudget:
+    """A job's latency SLO, shared out across its remaining encode work.
+
+    The deadline starts when the budget is created; each encode gets the share
+    of the time left that matches its share of the work still to do, so a job
+    with many encodes does not hand its full SLO to every one of them.
+    """
+
+    def __init__(self, latency_slo: Optional[float] = None):
+        self.deadline = time.monotonic() + (latency_slo or DEFAULT_LATENCY_SLO)
+
+    def remaining(self) -> float:
+        return max(0.0, self.deadline - time.monotonic())
+
+    def share(self, work: float, remaining_work: float) -> float:
+        if remaining_work <= 0:
+            return self.remaining()
+        return self.remaining() * min(1.0, work / remaining_work)
+
+
+def run_encode(cmd: List[str], profile: Optional[Dict] = None, media_seconds: Optional[float] = None,
+               out_path: str = None, cwd: str = None, record: bool = True):
+    """Run an ffmpeg encode and record its throughput when `media_seconds` and `out_path` are known.
+
+    Pass record=False for encodes that aren't representative of full renders (drafts).
+    """
+    profile = profile or get_profile()
+    t0 = time.monotonic()
+    run_cancellable(cmd, cwd=cwd)
+    if record and media_seconds and out_path:
+        record_encode(profile["preset"], media_seconds, time.monotonic() - t0, probe_pixels(out_path))
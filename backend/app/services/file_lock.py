@@ -0,0 +1,52 @@
+import json
+import os
+import time
+import uuid
+from contextlib import contextmanager
+
+
+@contextmanager
+def file_lock(path: str, stale_after: float = 30.0):
+    """Serialize read-modify-write of `path` across threads and worker processes.
+
+    Uses an O_EXCL lock file next to `path` (works on shared storage and
+    Windows); a lock file older than `stale_after` seconds is assumed abandoned.
+    Hold it only around the read and write, never around an encode.
+    """
+    lock_path = f"{path}.lock"
+    os.makedirs(os.path.dirname(os.path.abspath(lock_path)), exist_ok=True)
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(lock_path) > stale_after:
+                    os.remove(lock_path)
+                    continue
+            except OSError:
+                continue
+            time.sleep(0.05)
+    try:
+        yield
+    finally:
+        os.close(fd)
+        os.remove(lock_path)
+
+
+def write_json_atomic(path: str, data, **dump_kwargs):
+    """Write `data` as JSON to a temp file unique to this writer, then replace `path`.
+
+    Readers never see a partial file, and concurrent writers never share a temp
+    file (a shared `.tmp` name lets one writer's replace steal the other's).
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, **dump_kwargs)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
@@ -14,6 +14,8 @@ W_LENGTH = 0.4
 W_KEYWORD = 0.3
 W_ENERGY = 0.2
 W_PAUSE = 0.1
+# visual activity from the scene index; only contributes when shots are given
+W_MOTION = 0.1
 
 
 def _segment_energy(wav_path: str, start_s: float, end_s: float) -> float:
@@ -50,15 +52,32 @@ def _segment_energy(wav_path: str, start_s: float, end_s: float) -> float:
         return 0.0
 
 
-def detect_highlights(segments: List[Dict], wav_path: str, keywords: List[str] = None, top_k: int = 5) -> List[Dict]:
+def _segment_motion(shots: List[Dict], start_s: float, end_s: float) -> float:
+    # duration-weighted mean motion of the shots overlapping the segment
+    total = 0.0
+    weighted = 0.0
+    for shot in shots:
+        overlap = min(end_s, shot["end"]) - max(start_s, shot["start"])
+        if overlap > 0:
+            total += overlap
+            weighted += overlap * shot.get("motion", 0.0)
+    return weighted / total if total > 0 else 0.0
+
+
+def detect_highlights(segments: List[Dict], wav_path: str, keywords: List[str] = None, top_k: int = 5,
+                      shots: List[Dict] = None) -> List[Dict]:
     """Score segments and return top_k highlights.
 
     segments: list of {start, end, text}
     wav_path: path to mono WAV (16kHz) used to compute energy
+    shots: optional scene-index shots ({start, end, motion}) used as a visual activity feature
     """
     if keywords is None:
         keywords = ["important", "key", "note", "best", "tip", "announc", "highlight"]
 
+    shots = shots or []
+    max_motion = max((s.get("motion", 0.0) for s in shots), default=0.0)
+
     scored = []
     # precompute gaps
     for i, seg in enumerate(segments):
@@ -85,7 +104,10 @@ def detect_highlights(segments: List[Dict], wav_path: str, keywords: List[str] =
         # normalized length factor (capped at 1 for >=30s)
         length_score = min(1.0, length / 30.0)
 
-        score = W_LENGTH * length_score + W_KEYWORD * kw_score + W_ENERGY * energy + W_PAUSE * pause_score
+        # visual activity normalized to the most active shot of the source
+        motion = _segment_motion(shots, start, end) / max_motion if max_motion > 0 else 0.0
+
+        score = W_LENGTH * length_score + W_KEYWORD * kw_score + W_ENERGY * energy + W_PAUSE * pause_score + W_MOTION * motion
 
         scored.append({
             "start": start,
@@ -95,6 +117,7 @@ def detect_highlights(segments: List[Dict], wav_path: str, keywords: List[str] =
             "kw": kw_score,
             "energy": energy,
             "pause": pause_score,
+            "motion": motion,
             "score": score,
         })
 
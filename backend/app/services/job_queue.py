@@ -0,0 +1,162 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+# repo root (backend/app/services/ -> ../../..) so the API and workers agree on
+# the queue file whatever directory they were started from
+_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+DEFAULT_QUEUE_PATH = os.environ.get("CLIP_QUEUE_PATH") or os.path.join(_REPO_ROOT, "storage", "queue.db")
+# a running job whose lease is not renewed within this many seconds is handed to another worker
+LEASE_SECONDS = 60.0
+MAX_ATTEMPTS = 3
+# delay before retry n is RETRY_BACKOFF * n seconds
+RETRY_BACKOFF = 30.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL,
+    lease_until REAL,
+    worker TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+class JobQueue:
+    """Durable job queue in a SQLite file shared by the API and worker processes.
+
+    Workers claim a job by taking a time-limited lease and keep it alive with
+    heartbeats. A job whose lease runs out (worker crashed or was restarted) is
+    handed to the next worker, and failed jobs are retried with backoff, until
+    `max_attempts` is reached. Job status: queued -> running -> done|failed.
+    """
+
+    def __init__(self, path: str = DEFAULT_QUEUE_PATH, lease_seconds: float = LEASE_SECONDS,
+                 max_attempts: int = MAX_ATTEMPTS, retry_backoff: float = RETRY_BACKOFF):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._tx() as conn:
+            conn.execute(_SCHEMA)
+            conn.execute("CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _tx(self):
+        # BEGIN IMMEDIATE takes the write lock up front so two workers can't claim the same row
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _as_dict(row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        return job
+
+    def enqueue(self, kind: str, payload: Dict, job_id: str = None) -> str:
+        """Add a job of `kind` (see worker.HANDLERS) and return its id."""
+        job_id = job_id or str(uuid.uuid4())
+        now = time.time()
+        with self._tx() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, max_attempts, available_at, created_at, updated_at)"
+                " VALUES (?, ?, ?, 'queued', ?, ?, ?, ?)",
+                (job_id, kind, json.dumps(payload), self.max_attempts, now, now, now),
+            )
+        return job_id
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        """Lease the oldest ready job to `worker_id`, or return None if there is none."""
+        now = time.time()
+        with self._tx() as conn:
+            # expired leases with no attempts left become failures instead of being re-run
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = COALESCE(error, 'lease expired'), updated_at = ?"
+                " WHERE status = 'running' AND lease_until < ? AND attempts >= max_attempts",
+                (now, now),
+            )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE (status = 'queued' AND available_at <= ?)"
+                " OR (status = 'running' AND lease_until < ?) ORDER BY available_at, created_at LIMIT 1",
+                (now, now),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, attempts = attempts + 1, lease_until = ?,"
+                " updated_at = ? WHERE id = ?",
+                (worker_id, now + self.lease_seconds, now, row["id"]),
+            )
+        job = self._as_dict(row)
+        job.update({"status": "running", "worker": worker_id, "attempts": job["attempts"] + 1})
+        return job
+
+    def heartbeat(self, job_id: str, worker_id: str) -> bool:
+        """Extend the lease; False if `worker_id` no longer owns the job."""
+        now = time.time()
+        with self._tx() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET lease_until = ?, updated_at = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (now + self.lease_seconds, now, job_id, worker_id),
+            )
+        return cur.rowcount > 0
+
+    def complete(self, job_id: str, worker_id: str):
+        now = time.time()
+        with self._tx() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'done', lease_until = NULL, updated_at = ? WHERE id = ? AND worker = ?",
+                (now, job_id, worker_id),
+            )
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> Optional[str]:
+        """Record a failed attempt; requeue with backoff or mark failed. Returns the new status."""
+        now = time.time()
+        with self._tx() as conn:
+            row = conn.execute(
+                "SELECT attempts, max_attempts FROM jobs WHERE id = ? AND worker = ?", (job_id, worker_id)
+            ).fetchone()
+            if row is None:
+                return None
+            status = "queued" if row["attempts"] < row["max_attempts"] else "failed"
+            conn.execute(
+                "UPDATE jobs SET status = ?, available_at = ?, lease_until = NULL, error = ?, updated_at = ?"
+                " WHERE id = ?",
+                (status, now + self.retry_backoff * row["attempts"], error, now, job_id),
+            )
+        return status
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        conn = self._connect()
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        finally:
+            conn.close()
+        return self._as_dict(row) if row else None
@@ -2,12 +2,28 @@ import os
 import json
 import subprocess
 import sys
+import threading
+import time
 from .video_downloader import download_video
 from .video_normalizer import normalize_video
 from .audio_extractor import extract_audio
 from .asr_service import transcribe_with_default
 from .highlight_engine import detect_highlights
 from .video_cutter import group_segments_to_clips, cut_clips
+from .subtitle_burner import write_clip_srt, burn_subtitles
+from .video_formatter import format_vertical
+from .draft_renderer import render_draft
+from .encoding_profiles import (
+    DEFAULT_PROFILE, VERTICAL_PIXELS, EncodeBudget, resolve_profile, probe_duration, probe_pixels,
+)
+from .reframer import subject_track, crop_x_expression
+from .scene_index import scene_index
+from .cancellation import JobCancelled, cancel_scope, check_cancelled, current_cancel_event
+from .file_lock import file_lock, write_json_atomic
+
+def _clips_meta_lock(meta_path: str):
+    # clips metadata is updated by the pipeline and by render jobs on other workers
+    return file_lock(meta_path)
 
 
 def _write_srt(segments, out_srt_path):
@@ -33,16 +49,184 @@ def _write_srt(segments, out_srt_path):
         f.write("\n".join(lines))
 
 
-def run_full_pipeline(video_url: str, job_id: str):
+def _clips_meta_path(base: str, job_id: str) -> str:
+    return os.path.join(base, "storage", "transcripts", f"{job_id}_clips.json")
+
+
+def _clip_srt_path(base: str, job_id: str, idx: int) -> str:
+    return os.path.join(base, "storage", "subtitles", f"{job_id}_clip_{idx:02d}.srt")
+
+
+def _job_options_path(base: str, job_id: str) -> str:
+    return os.path.join(base, "storage", "transcripts", f"{job_id}_job.json")
+
+
+def _read_job_options(base: str, job_id: str) -> dict:
+    try:
+        with open(_job_options_path(base, job_id), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _read_clips_meta(path: str) -> list:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_clips_meta(path: str, meta: list):
+    write_json_atomic(path, meta, ensure_ascii=False, indent=2)
+
+
+def clip_render_state(entry: dict, queue=None) -> str:
+    """Render state of a clips metadata entry (draft|queued|rendering|full|error).
+
+    With `queue`, a queued/rendering entry whose render job (`render_job`) has
+    failed or is missing from the queue reports `error`: no worker will update
+    it any more (e.g. the last attempt's worker was killed), so the user can
+    request the render again.
+    """
+    state = entry.get("render", "full")
+    if queue is not None and state in ("queued", "rendering"):
+        job = queue.get(entry["render_job"]) if entry.get("render_job") else None
+        if job is None or job["status"] == "failed":
+            return "error"
+    return state
+
+
+def request_full_render(job_id: str, clip_id: int, queue, payload: dict, base: str = None) -> str:
+    """Enqueue a full render of one clip unless one is already on its way; return the previous state.
+
+    Under the clips metadata lock, a draft|error clip (see clip_render_state) gets
+    a `render_clip` job with `payload` on `queue` and is marked `queued` with the
+    job's id in `render_job`. Other states are left alone so repeated requests
+    don't enqueue duplicates. Raises IndexError for unknown clips.
+    """
+    base = base or os.getcwd()
+    meta_path = _clips_meta_path(base, job_id)
+    with _clips_meta_lock(meta_path):
+        meta = _read_clips_meta(meta_path)
+        if clip_id < 1 or clip_id > len(meta):
+            raise IndexError(f"clip {clip_id} not found for job {job_id}")
+        state = clip_render_state(meta[clip_id - 1], queue)
+        if state in ("draft", "error"):
+            # enqueue before marking, so the entry never points at a missing job
+            render_job = queue.enqueue("render_clip", payload)
+            meta[clip_id - 1].update({"render": "queued", "render_job": render_job})
+            _write_clips_meta(meta_path, meta)
+    return state
+
+
+def render_full_clip(job_id: str, clip_id: int, base: str = None, encoding_profile: str = None,
+                     latency_slo: float = None, will_retry: bool = False, render_job: str = None) -> dict:
+    """Render the full-quality version of one clip (cut -> burn subtitles -> 1080x1920).
+
+    `clip_id` is the 1-based index in `{job_id}_clips.json`; the entry is updated
+    in place with `burned`/`vertical` paths and `render` = rendering|full|error
+    (draft -> queued via request_full_render first when rendered on demand).
+    The encoding profile defaults to the one the job was queued with. `latency_slo`
+    is the time budget for this render's encodes: run_full_pipeline passes this
+    clip's share of the job budget, while an on-demand render is its own job and
+    gets the job's full SLO. With `will_retry` a failure puts the clip back to
+    `queued` (keeping `render_error`) instead of `error`. `render_job` is the queue
+    job doing the render when it isn't the one request_full_render enqueued.
+    """
+    base = base or os.getcwd()
+    options = _read_job_options(base, job_id)
+    encoding_profile = encoding_profile or options.get("encoding_profile", DEFAULT_PROFILE)
+    if latency_slo is None:
+        latency_slo = options.get("latency_slo")
+    meta_path = _clips_meta_path(base, job_id)
+    with _clips_meta_lock(meta_path):
+        meta = _read_clips_meta(meta_path)
+        if clip_id < 1 or clip_id > len(meta):
+            raise IndexError(f"clip {clip_id} not found for job {job_id}")
+        spec = meta[clip_id - 1]["clip"]
+        meta[clip_id - 1]["render"] = "rendering"
+        if render_job:
+            meta[clip_id - 1]["render_job"] = render_job
+        _write_clips_meta(meta_path, meta)
+
+    try:
+        normalized = os.path.join(base, "storage", "normalized", f"{job_id}.mp4")
+        # three encodes of the clip: cut and subtitle burn at source size, then vertical format
+        src_pixels = probe_pixels(normalized) or VERTICAL_PIXELS
+        profile = resolve_profile(
+            encoding_profile,
+            3 * float(spec.get("duration", 0.0)),
+            latency_slo,
+            pixels=(2 * src_pixels + VERTICAL_PIXELS) // 3,
+        )
+        clips_dir = os.path.join(base, "storage", "clips", job_id)
+        cf = cut_clips(normalized, [spec], clips_dir, start_index=clip_id, profile=profile)[0]
+        clip_file = cf.get("file")
+
+        clip_srt = _clip_srt_path(base, job_id, clip_id)
+        if not os.path.exists(clip_srt):
+            transcript_path = os.path.join(base, "storage", "transcripts", f"{job_id}.json")
+            with open(transcript_path, "r", encoding="utf-8") as f:
+                segments = json.load(f)
+            write_clip_srt(segments, cf["start"], cf["end"], clip_srt)
+
+        final_dir = os.path.join(base, "storage", "final_clips", job_id)
+        # burned subtitles file
+        burned = os.path.join(final_dir, f"clip_{clip_id:02d}_burned.mp4")
+        try:
+            burn_subtitles(clip_file, clip_srt, burned, profile=profile)
+        except Exception:
+            # fallback: copy clip as burned (no subtitles)
+            burned = clip_file
+
+        # follow the speaker when a face track is available, else center crop
+        try:
+            subject_cache = os.path.join(base, "storage", "analysis", f"{job_id}_subject.json")
+            crop_x = crop_x_expression(subject_track(normalized, cf["start"], cf["end"], subject_cache))
+        except Exception:
+            crop_x = None
+
+        # vertical formatted
+        vertical = os.path.join(final_dir, f"clip_{clip_id:02d}_vertical.mp4")
+        try:
+            format_vertical(burned, vertical, profile=profile, crop_x=crop_x)
+        except Exception:
+            # fallback to burned if formatting fails
+            vertical = burned
+        update = {"clip": cf, "burned": burned, "vertical": vertical, "render": "full", "profile": profile["name"]}
+    except Exception as e:
+        update = {"render": "queued" if will_retry else "error", "render_error": str(e)}
+
+    check_cancelled()
+    with _clips_meta_lock(meta_path):
+        meta = _read_clips_meta(meta_path)
+        meta[clip_id - 1].update(update)
+        _write_clips_meta(meta_path, meta)
+    return meta[clip_id - 1]
+
+
+def run_full_pipeline(video_url: str, job_id: str, full_render: bool = False,
+                      encoding_profile: str = DEFAULT_PROFILE, latency_slo: float = None,
+                      will_retry: bool = False):
     """Run a minimal demo pipeline synchronously:
     download -> normalize -> extract audio -> ASR -> write SRT + transcript json
+    -> highlights -> low-res draft clips (-> full-quality clips if `full_render`)
+
+    `encoding_profile` names a profile from encoding_profiles.PROFILES, or
+    `adaptive` to pick one per encode from recent host throughput. `latency_slo`
+    is the whole job's budget (from start, download and ASR included); each
+    encode gets its share of the time left (see EncodeBudget).
+
+    Failures end in status `error`, or `retrying` when `will_retry` (the worker
+    will run the job again), so the UI doesn't treat them as final.
     """
+    error_state = "retrying" if will_retry else "error"
     base = os.getcwd()
     raw_path = os.path.join(base, "storage", "raw_videos", f"{job_id}.%(ext)s")
     # yt-dlp style output path expects a template; download_video will write exact file
     downloaded = os.path.join(base, "storage", "raw_videos", f"{job_id}.mp4")
 
     def _write_status(state: str, extra: dict = None):
+        # status writes sit between every stage: stop there once the worker lost the job
+        check_cancelled()
         status_path = os.path.join(base, "storage", "transcripts", f"{job_id}_status.json")
         payload = {"video_id": job_id, "status": state}
         if extra:
@@ -54,6 +238,14 @@ def run_full_pipeline(video_url: str, job_id: str):
         except Exception:
             pass
 
+    # remembered so on-demand full renders use the job's encoding settings
+    job_options_path = _job_options_path(base, job_id)
+    os.makedirs(os.path.dirname(job_options_path), exist_ok=True)
+    with open(job_options_path, "w", encoding="utf-8") as f:
+        json.dump({"video_url": video_url, "encoding_profile": encoding_profile, "latency_slo": latency_slo}, f)
+
+    budget = EncodeBudget(latency_slo)
+
     try:
         _write_status("downloading")
         download_video(video_url, downloaded)
@@ -68,8 +260,37 @@ def run_full_pipeline(video_url: str, job_id: str):
         except Exception:
             _write_status("downloaded")
         normalized = os.path.join(base, "storage", "normalized", f"{job_id}.mp4")
-        _write_status("normalizing")
-        normalize_video(downloaded, normalized)
+        src_duration = probe_duration(downloaded) or 0.0
+        src_pixels = probe_pixels(downloaded) or VERTICAL_PIXELS
+        normalize_work = src_duration * src_pixels
+        # with full_render, clips may cover the whole source: budget for that too
+        full_work = src_duration * (2 * src_pixels + VERTICAL_PIXELS) if full_render else 0.0
+        profile = resolve_profile(
+            encoding_profile,
+            src_duration,
+            budget.share(normalize_work, normalize_work + full_work),
+            pixels=src_pixels,
+        )
+        _write_status("normalizing", {"encoding_profile": profile["name"]})
+        normalize_video(downloaded, normalized, profile=profile)
+
+        # shot detection is a single low-res decode; overlap it with audio + ASR
+        scenes = {"cuts": [], "shots": []}
+
+        cancel_event = current_cancel_event()
+
+        def _index_scenes():
+            # cancellation is per thread: re-enter the job's scope so a lost lease
+            # kills this decode too
+            try:
+                with cancel_scope(cancel_event):
+                    scenes.update(scene_index(normalized, os.path.join(base, "storage", "analysis", f"{job_id}_scenes.json")))
+            except (Exception, JobCancelled):
+                pass
+
+        scene_thread = threading.Thread(target=_index_scenes, daemon=True)
+        scene_thread.start()
+
         _write_status("audio_extracting")
         audio_path = os.path.join(base, "storage", "audio", f"{job_id}.wav")
         extract_audio(normalized, audio_path)
@@ -90,10 +311,12 @@ def run_full_pipeline(video_url: str, job_id: str):
         with open(transcript_path, "w", encoding="utf-8") as f:
             json.dump(segments, f, ensure_ascii=False, indent=2)
 
+        scene_thread.join()
+
         _write_status("detecting_highlights")
         # detect highlights (rule-based) and save
         try:
-            highlights = detect_highlights(segments, audio_path)
+            highlights = detect_highlights(segments, audio_path, shots=scenes["shots"])
         except Exception as e:
             highlights = [{"error": str(e)}]
 
@@ -104,54 +327,64 @@ def run_full_pipeline(video_url: str, job_id: str):
         _write_status("generating_clips")
         # auto-generate clips by grouping transcript segments
         try:
-            clips_specs = group_segments_to_clips(segments, min_len=15, max_len=60, gap_threshold=3.0)
-            clips_dir = os.path.join(base, "storage", "clips", job_id)
-            os.makedirs(clips_dir, exist_ok=True)
-            cut_files = cut_clips(normalized, clips_specs, clips_dir)
-
-            # For each cut file, create per-clip SRT, burn subtitles, and create vertical format
-            from .subtitle_burner import write_clip_srt, burn_subtitles
-            from .video_formatter import format_vertical
-
+            clips_specs = group_segments_to_clips(
+                segments, min_len=15, max_len=60, gap_threshold=3.0, scene_cuts=scenes["cuts"]
+            )
             final_dir = os.path.join(base, "storage", "final_clips", job_id)
             os.makedirs(final_dir, exist_ok=True)
+            clips_meta_path = _clips_meta_path(base, job_id)
 
-            final_meta = []
-            for idx, cf in enumerate(cut_files, start=1):
-                clip_file = cf.get("file")
-                clip_start = cf.get("start", 0.0)
-                clip_end = cf.get("end", clip_start + cf.get("duration", 0.0))
-                # per-clip srt
-                clip_srt = os.path.join(base, "storage", "subtitles", f"{job_id}_clip_{idx:02d}.srt")
+            # Draft tier: one cheap low-res pass per clip (cut + 9:16 + subtitles),
+            # listed as soon as it exists. Full-quality renders run on demand.
+            with _clips_meta_lock(clips_meta_path):
+                _write_clips_meta(clips_meta_path, [])
+            clips_count = 0
+            for idx, spec in enumerate(clips_specs, start=1):
+                clip_start = spec["start"]
+                clip_end = spec["end"]
+                duration = max(0.01, clip_end - clip_start)
+                clip_srt = _clip_srt_path(base, job_id, idx)
                 write_clip_srt(segments, clip_start, clip_end, clip_srt)
 
-                # burned subtitles file
-                burned = os.path.join(final_dir, f"clip_{idx:02d}_burned.mp4")
+                draft = os.path.join(final_dir, f"clip_{idx:02d}_draft.mp4")
                 try:
-                    burn_subtitles(clip_file, clip_srt, burned)
+                    render_draft(normalized, clip_start, duration, clip_srt, draft)
                 except Exception:
-                    # fallback: copy clip as burned (no subtitles)
-                    burned = clip_file
+                    draft = None
 
-                # vertical formatted
-                vertical = os.path.join(final_dir, f"clip_{idx:02d}_vertical.mp4")
-                try:
-                    format_vertical(burned, vertical)
-                except Exception:
-                    # fallback to burned if formatting fails
-                    vertical = burned
-
-                final_meta.append({"clip": cf, "burned": burned, "vertical": vertical})
+                entry = {
+                    "clip": {"start": clip_start, "end": clip_end, "duration": duration},
+                    "draft": draft,
+                    "burned": None,
+                    "vertical": None,
+                    "render": "draft",
+                }
+                check_cancelled()
+                # re-read under the lock: a full render of an earlier clip may have
+                # updated its entry since our last write
+                with _clips_meta_lock(clips_meta_path):
+                    meta = _read_clips_meta(clips_meta_path)
+                    if len(meta) >= idx:
+                        meta[idx - 1] = entry
+                    else:
+                        meta.append(entry)
+                    _write_clips_meta(clips_meta_path, meta)
+                clips_count = idx
+                _write_status("rendering_drafts", {"clips_count": clips_count})
 
-            clips_meta_path = os.path.join(base, "storage", "transcripts", f"{job_id}_clips.json")
-            with open(clips_meta_path, "w", encoding="utf-8") as f:
-                json.dump(final_meta, f, ensure_ascii=False, indent=2)
-            _write_status("finished", {"clips_count": len(final_meta)})
+            if full_render:
+                with _clips_meta_lock(clips_meta_path):
+                    durations = [m["clip"]["duration"] for m in _read_clips_meta(clips_meta_path)]
+                for idx in range(1, clips_count + 1):
+                    clip_budget = budget.share(durations[idx - 1], sum(durations[idx - 1:]))
+                    # the process job (queued under the video id) is this clip's render job
+                    render_full_clip(job_id, idx, base=base, latency_slo=clip_budget, render_job=job_id)
+            _write_status("finished", {"clips_count": clips_count})
         except Exception as e:
             clips_meta_path = os.path.join(base, "storage", "transcripts", f"{job_id}_clips_error.log")
             with open(clips_meta_path, "w", encoding="utf-8") as f:
                 f.write(str(e))
-            _write_status("error", {"error": str(e)})
+            _write_status(error_state, {"error": str(e)})
 
     except Exception as e:
         # basic logging to a file
@@ -159,6 +392,6 @@ def run_full_pipeline(video_url: str, job_id: str):
         with open(log_path, "w", encoding="utf-8") as f:
             f.write(str(e))
         try:
-            _write_status("error", {"error": str(e)})
+            _write_status(error_state, {"error": str(e)})
         except Exception:
             pass
@@ -0,0 +1,179 @@
+import json
+import os
+import subprocess
+from typing import List, Optional
+from imageio_ffmpeg import get_ffmpeg_exe
+
+from .cancellation import check_cancelled
+from .encoding_profiles import probe_size
+from .file_lock import file_lock, write_json_atomic
+
+try:
+    import cv2
+    import numpy as np
+    _HAS_CV2 = True
+except Exception:
+    _HAS_CV2 = False
+
+# Detection runs on a downscaled, low-fps sample, never on full 30fps frames
+SAMPLE_FPS = 3
+SAMPLE_WIDTH = 320
+# moving-average window (seconds) applied to the crop-center path
+SMOOTH_WINDOW = 1.5
+# max deviation (fraction of frame width) when dropping path keypoints
+MAX_KEYPOINT_ERROR = 0.02
+
+
+def sample_subject_centers(video: str, start: float, end: float, fps: int = SAMPLE_FPS,
+                           width: int = SAMPLE_WIDTH) -> List[List]:
+    """Detect the largest face in a low-fps, downscaled sample of `video` between start and end.
+
+    Returns [[t, cx], ...] with t relative to `start` and cx the face center as a
+    fraction of frame width, or None for samples without a face.
+    """
+    if not _HAS_CV2:
+        raise RuntimeError("opencv is not available. Install opencv-python-headless to use reframing.")
+    size = probe_size(video)
+    if not size:
+        return []
+    height = max(2, int(round(width * size[1] / size[0] / 2.0)) * 2)
+    frame_bytes = width * height
+
+    detector = cv2.CascadeClassifier(os.path.join(cv2.data.haarcascades, "haarcascade_frontalface_default.xml"))
+    cmd = [
+        get_ffmpeg_exe(),
+        "-v",
+        "error",
+        "-ss",
+        str(start),
+        "-i",
+        video,
+        "-t",
+        str(max(0.01, end - start)),
+        "-vf",
+        f"fps={fps},scale={width}:{height}",
+        "-f",
+        "rawvideo",
+        "-pix_fmt",
+        "gray",
+        "-",
+    ]
+    samples = []
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    try:
+        i = 0
+        while True:
+            check_cancelled()
+            buf = proc.stdout.read(frame_bytes)
+            if len(buf) < frame_bytes:
+                break
+            frame = np.frombuffer(buf, dtype=np.uint8).reshape(height, width)
+            faces = detector.detectMultiScale(frame, scaleFactor=1.1, minNeighbors=4, minSize=(16, 16))
+            cx = None
+            if len(faces):
+                x, _, fw, fh = max(faces, key=lambda f: f[2] * f[3])
+                cx = (float(x) + fw / 2.0) / width
+            samples.append([i / float(fps), cx])
+            i += 1
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+        proc.stdout.close()
+        proc.wait()
+    return samples
+
+
+def _simplify(points: List[List], eps: float) -> List[List]:
+    # Ramer-Douglas-Peucker on the (t, cx) polyline, measuring error along cx
+    if len(points) <= 2:
+        return points
+    (t0, c0), (t1, c1) = points[0], points[-1]
+    worst, worst_i = 0.0, 0
+    for i in range(1, len(points) - 1):
+        t, c = points[i]
+        expected = c0 + (c1 - c0) * (t - t0) / (t1 - t0) if t1 > t0 else c0
+        if abs(c - expected) > worst:
+            worst, worst_i = abs(c - expected), i
+    if worst <= eps:
+        return [points[0], points[-1]]
+    left = _simplify(points[:worst_i + 1], eps)
+    return left[:-1] + _simplify(points[worst_i:], eps)
+
+
+def smooth_path(samples: List[List], fps: int = SAMPLE_FPS) -> List[List]:
+    """Turn raw samples into a smoothed, sparse crop-center path [[t, cx], ...].
+
+    Gaps without a detection are linearly interpolated (held at the ends); returns
+    an empty list when no sample has a face.
+    """
+    known = [i for i, (_, cx) in enumerate(samples) if cx is not None]
+    if not known:
+        return []
+
+    filled = []
+    for i, (t, cx) in enumerate(samples):
+        if cx is None:
+            prev = max((k for k in known if k < i), default=None)
+            nxt = min((k for k in known if k > i), default=None)
+            if prev is None:
+                cx = samples[nxt][1]
+            elif nxt is None:
+                cx = samples[prev][1]
+            else:
+                frac = (i - prev) / float(nxt - prev)
+                cx = samples[prev][1] + frac * (samples[nxt][1] - samples[prev][1])
+        filled.append([t, cx])
+
+    half = max(0, int(SMOOTH_WINDOW * fps) // 2)
+    smoothed = []
+    for i, (t, _) in enumerate(filled):
+        window = filled[max(0, i - half):i + half + 1]
+        smoothed.append([t, sum(c for _, c in window) / len(window)])
+    return _simplify(smoothed, MAX_KEYPOINT_ERROR)
+
+
+def crop_x_expression(path: List[List]) -> Optional[str]:
+    """ffmpeg crop `x` expression following `path` (piecewise linear in t), or None."""
+    if not path:
+        return None
+    if len(path) == 1:
+        center = f"{path[0][1]:.4f}"
+    else:
+        # flat sum of gated segments rather than nested if() to keep the parser shallow
+        terms = [f"lt(t,{path[0][0]:.3f})*{path[0][1]:.4f}"]
+        for (t0, c0), (t1, c1) in zip(path, path[1:]):
+            slope = (c1 - c0) / (t1 - t0) if t1 > t0 else 0.0
+            terms.append(f"gte(t,{t0:.3f})*lt(t,{t1:.3f})*({c0:.4f}{slope:+.5f}*(t-{t0:.3f}))")
+        terms.append(f"gte(t,{path[-1][0]:.3f})*{path[-1][1]:.4f}")
+        center = "+".join(terms)
+    return f"clip(iw*({center})-ow/2,0,iw-ow)"
+
+
+def subject_track(video: str, start: float, end: float, cache_path: str) -> List[List]:
+    """Smoothed crop-center path for [start, end) of `video`, cached in `cache_path`.
+
+    The cache is one JSON sidecar per source keyed by clip range, so re-renders of
+    a clip never re-run detection.
+    """
+    key = f"{start:.3f}:{end:.3f}"
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except Exception:
+        cache = {}
+    if key in cache.get("ranges", {}):
+        return cache["ranges"][key]
+
+    path = smooth_path(sample_subject_centers(video, start, end))
+
+    # parallel render_clip jobs on other workers add their own ranges to the same file
+    with file_lock(cache_path):
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except Exception:
+            cache = {}
+        cache.update({"fps": SAMPLE_FPS, "width": SAMPLE_WIDTH})
+        cache.setdefault("ranges", {})[key] = path
+        write_json_atomic(cache_path, cache)
+    return path
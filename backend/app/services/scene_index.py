@@ -0,0 +1,87 @@
+import json
+import re
+import tempfile
+from typing import Dict, List
+from imageio_ffmpeg import get_ffmpeg_exe
+
+from .cancellation import check_cancelled, run_cancellable
+from .file_lock import write_json_atomic
+
+# One cheap pass per source: a few fps at thumbnail width is enough to see cuts
+SAMPLE_FPS = 10
+SAMPLE_WIDTH = 160
+# ffmpeg scene score (0..1) above which two samples are considered different shots
+SCENE_THRESHOLD = 0.3
+
+
+def _scan_scene_scores(video: str, fps: int, width: int) -> List[List[float]]:
+    cmd = [
+        get_ffmpeg_exe(),
+        "-v",
+        "error",
+        "-i",
+        video,
+        "-an",
+        "-vf",
+        f"fps={fps},scale={width}:-2,select='gte(scene,0)',metadata=print:file=-",
+        "-f",
+        "null",
+        "-",
+    ]
+    # a full-length decode: killed if the job is cancelled; output goes to a file
+    # since metadata=print is large for long sources
+    with tempfile.TemporaryFile(mode="w+", encoding="utf-8", errors="replace") as out:
+        run_cancellable(cmd, stdout=out)
+        out.seek(0)
+        output = out.read()
+    scores = []
+    t = None
+    for line in output.splitlines():
+        m = re.search(r"pts_time:([\d.]+)", line)
+        if m:
+            t = float(m.group(1))
+            continue
+        m = re.search(r"lavfi\.scene_score=([\d.]+)", line)
+        if m and t is not None:
+            scores.append([t, float(m.group(1))])
+            t = None
+    return scores
+
+
+def build_scene_index(scores: List[List[float]], threshold: float = SCENE_THRESHOLD) -> Dict:
+    """Turn per-sample scene scores into cut timestamps and per-shot motion.
+
+    A shot's motion is the mean scene score of its samples (excluding the cut
+    itself), i.e. how much the picture changes while the shot lasts.
+    """
+    cuts = [t for t, s in scores if s >= threshold and t > 0]
+    end = scores[-1][0] if scores else 0.0
+    bounds = [0.0] + cuts + [end]
+    shots = []
+    for s_start, s_end in zip(bounds, bounds[1:]):
+        inside = [s for t, s in scores if s_start < t < s_end and s < threshold]
+        motion = sum(inside) / len(inside) if inside else 0.0
+        shots.append({"start": s_start, "end": s_end, "motion": motion})
+    return {"cuts": cuts, "shots": shots}
+
+
+def scene_index(video: str, cache_path: str, fps: int = SAMPLE_FPS, width: int = SAMPLE_WIDTH,
+                threshold: float = SCENE_THRESHOLD) -> Dict:
+    """Return {'cuts': [t, ...], 'shots': [{start, end, motion}, ...]} for `video`.
+
+    Computed with a single low-resolution decode and cached in the `cache_path`
+    sidecar; later calls for the same source just read it back.
+    """
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        if cached.get("fps") == fps and cached.get("width") == width and cached.get("threshold") == threshold:
+            return cached
+    except Exception:
+        pass
+
+    index = build_scene_index(_scan_scene_scores(video, fps, width), threshold)
+    index.update({"fps": fps, "width": width, "threshold": threshold})
+    check_cancelled()
+    write_json_atomic(cache_path, index, ensure_ascii=False, indent=2)
+    return index
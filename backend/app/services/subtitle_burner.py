@@ -1,8 +1,9 @@
 import os
-import subprocess
 from typing import List, Dict
 from imageio_ffmpeg import get_ffmpeg_exe
 
+from .encoding_profiles import x264_args, run_encode, probe_duration
+
 
 def _fmt_ts(t: float) -> str:
     h = int(t // 3600)
@@ -38,19 +39,17 @@ def write_clip_srt(segments: List[Dict], clip_start: float, clip_end: float, out
         f.write("\n".join(lines))
 
 
-def burn_subtitles(input_video: str, srt_path: str, out_video: str):
-    """Burn subtitles from `srt_path` into `input_video` using ffmpeg subtitles filter."""
-    os.makedirs(os.path.dirname(out_video), exist_ok=True)
-    # ffmpeg subtitles filter expects path; ensure proper escaping if needed
-    ffmpeg = get_ffmpeg_exe()
+def subtitles_filter(srt_path: str, work_dir: str) -> str:
+    """Return an ffmpeg `subtitles=` filter for `srt_path`, to be run with cwd=`work_dir`.
+
+    Copies the SRT into `work_dir` with a simple basename so ffmpeg's libass can
+    open it reliably on Windows; falls back to the absolute path if copying fails.
+    """
     # Use the absolute path wrapped in single quotes so ffmpeg's subtitles
     # filter receives the correct filename (avoids parser issues on Windows).
     abs_srt = os.path.abspath(srt_path)
-    clip_dir = os.path.dirname(os.path.abspath(input_video)) or "."
-    # Copy SRT into the clip directory with a simple basename so ffmpeg's
-    # libass can open it reliably on Windows when running from that folder.
     srt_basename = os.path.basename(abs_srt)
-    local_srt = os.path.join(clip_dir, srt_basename)
+    local_srt = os.path.join(work_dir, srt_basename)
     try:
         if os.path.abspath(abs_srt) != os.path.abspath(local_srt):
             with open(abs_srt, "rb") as src, open(local_srt, "wb") as dst:
@@ -59,7 +58,16 @@ def burn_subtitles(input_video: str, srt_path: str, out_video: str):
         # If copying fails, fall back to using absolute path in the filter.
         local_srt = abs_srt
 
-    vf_arg = f"subtitles={srt_basename if os.path.exists(local_srt) else local_srt}"
+    return f"subtitles={srt_basename if os.path.exists(local_srt) else local_srt}"
+
+
+def burn_subtitles(input_video: str, srt_path: str, out_video: str, profile: Dict = None):
+    """Burn subtitles from `srt_path` into `input_video` using ffmpeg subtitles filter."""
+    os.makedirs(os.path.dirname(out_video), exist_ok=True)
+    # ffmpeg subtitles filter expects path; ensure proper escaping if needed
+    ffmpeg = get_ffmpeg_exe()
+    clip_dir = os.path.dirname(os.path.abspath(input_video)) or "."
+    vf_arg = subtitles_filter(srt_path, clip_dir)
     cmd = [
         ffmpeg,
         "-y",
@@ -67,12 +75,9 @@ def burn_subtitles(input_video: str, srt_path: str, out_video: str):
         input_video,
         "-vf",
         vf_arg,
-        "-c:v",
-        "libx264",
-        "-preset",
-        "fast",
+        *x264_args(profile),
         "-c:a",
         "aac",
         out_video,
     ]
-    subprocess.check_call(cmd, cwd=clip_dir)
+    run_encode(cmd, profile, media_seconds=probe_duration(input_video), out_path=out_video, cwd=clip_dir)
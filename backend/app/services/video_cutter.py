@@ -1,15 +1,26 @@
 import os
-import subprocess
 from typing import List, Dict
 
+from .encoding_profiles import x264_args, run_encode
 
-def group_segments_to_clips(segments: List[Dict], min_len: int = 15, max_len: int = 60, gap_threshold: float = 3.0) -> List[Dict]:
+
+def _snap(t: float, cuts: List[float], lo: float, hi: float) -> float:
+    """Nearest scene cut to `t` within [lo, hi], else `t` unchanged."""
+    best = min((c for c in cuts if lo <= c <= hi), key=lambda c: abs(c - t), default=None)
+    return t if best is None else best
+
+
+def group_segments_to_clips(segments: List[Dict], min_len: int = 15, max_len: int = 60, gap_threshold: float = 3.0,
+                            scene_cuts: List[float] = None, snap_window: float = 1.5) -> List[Dict]:
     """Group transcript segments into clip ranges.
 
     Algorithm (simple greedy):
     - sort segments by start
     - accumulate adjacent segments when gap <= gap_threshold and total length <= max_len
     - if accumulated length < min_len, extend end to start+min_len (bounded by max_len)
+    - if `scene_cuts` are given, widen each clip to the nearest shot change within
+      `snap_window` seconds (start earlier, end later, never into a neighbouring
+      clip) so speech is never cut; kept only if the length stays in min_len..max_len
     Returns list of {'start': float, 'end': float}
     """
     if not segments:
@@ -56,19 +67,29 @@ def group_segments_to_clips(segments: List[Dict], min_len: int = 15, max_len: in
     for c in clips:
         c["start"] = float(c["start"]) if c.get("start") is not None else 0.0
         c["end"] = float(c["end"]) if c.get("end") is not None else c.get("start", 0.0)
+
+    if scene_cuts:
+        for i, c in enumerate(clips):
+            prev_end = clips[i - 1]["end"] if i > 0 else 0.0
+            next_start = clips[i + 1]["start"] if i + 1 < len(clips) else float("inf")
+            start = _snap(c["start"], scene_cuts, max(prev_end, c["start"] - snap_window), c["start"])
+            end = _snap(c["end"], scene_cuts, c["end"], min(next_start, c["end"] + snap_window))
+            if min_len <= end - start <= max_len:
+                c["start"], c["end"] = start, end
     return clips
 
 
-def cut_clips(input_video: str, clips: List[Dict], out_dir: str) -> List[Dict]:
+def cut_clips(input_video: str, clips: List[Dict], out_dir: str, start_index: int = 1, profile: Dict = None) -> List[Dict]:
     """Cut clips from `input_video` using ffmpeg and save to `out_dir`.
 
+    Files are numbered from `start_index` (clip_01.mp4, ...).
     Returns list of metadata dicts with keys: file, start, end, duration
     """
     os.makedirs(out_dir, exist_ok=True)
     out_files = []
     from imageio_ffmpeg import get_ffmpeg_exe
     ffmpeg = get_ffmpeg_exe()
-    for idx, c in enumerate(clips, start=1):
+    for idx, c in enumerate(clips, start=start_index):
         start = float(c.get("start", 0.0))
         end = float(c.get("end", start))
         duration = max(0.01, end - start)
@@ -82,14 +103,11 @@ def cut_clips(input_video: str, clips: List[Dict], out_dir: str) -> List[Dict]:
             str(start),
             "-t",
             str(duration),
-            "-c:v",
-            "libx264",
-            "-preset",
-            "fast",
+            *x264_args(profile),
             "-c:a",
             "aac",
             out_path,
         ]
-        subprocess.check_call(cmd)
+        run_encode(cmd, profile, media_seconds=duration, out_path=out_path)
         out_files.append({"file": out_path, "start": start, "end": end, "duration": duration})
     return out_files
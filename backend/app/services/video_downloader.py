@@ -1,7 +1,8 @@
-import subprocess
 import os
 import sys
 
+from .cancellation import run_cancellable
+
 
 def download_video(url: str, out_path: str):
     """Download video using yt-dlp invoked with the same Python interpreter.
@@ -11,4 +12,4 @@ def download_video(url: str, out_path: str):
     """
     os.makedirs(os.path.dirname(out_path), exist_ok=True)
     cmd = [sys.executable, "-m", "yt_dlp", "-f", "best", "-o", out_path, url]
-    subprocess.check_call(cmd)
+    run_cancellable(cmd)
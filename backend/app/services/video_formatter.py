@@ -1,23 +1,25 @@
 import os
-import subprocess
+from typing import Dict, Optional
 from imageio_ffmpeg import get_ffmpeg_exe
 
+from .encoding_profiles import x264_args, run_encode, probe_duration
 
-def format_vertical(input_video: str, out_video: str, width: int = 1080, height: int = 1920):
-    """Format `input_video` to vertical 9:16 (width x height) by scaling and center cropping/padding.
 
-    Uses an ffmpeg filter chain to scale to target height, crop center to width:height,
-    and pad if necessary to exactly match dimensions.
+def format_vertical(input_video: str, out_video: str, width: int = 1080, height: int = 1920, profile: Dict = None,
+                    crop_x: Optional[str] = None):
+    """Format `input_video` to vertical 9:16 (width x height) by scaling and cropping/padding.
+
+    Uses an ffmpeg filter chain to scale to target height, crop to width:height,
+    and pad if necessary to exactly match dimensions. The crop is centered unless
+    `crop_x` gives a (time-varying) crop x expression, see reframer.crop_x_expression.
     """
     os.makedirs(os.path.dirname(out_video), exist_ok=True)
 
-    vf = (
-        "scale='if(gt(a,9/16),-1,{} )':'if(gt(a,9/16),{},-1)',"
-        "crop={}:{}", 
-    ).format(width, height, width, height)
-
+    crop = f"crop={width}:{height}"
+    if crop_x:
+        crop = f"crop=w={width}:h={height}:x='{crop_x}':y=(ih-oh)/2"
     # Add pad to ensure exact size (centering)
-    vf = f"scale='if(gt(a,9/16),-1,{height})':'if(gt(a,9/16),{height},-1)',crop={width}:{height},pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1"
+    vf = f"scale='if(gt(a,9/16),-1,{height})':'if(gt(a,9/16),{height},-1)',{crop},pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1"
 
     ffmpeg = get_ffmpeg_exe()
     cmd = [
@@ -27,12 +29,9 @@ def format_vertical(input_video: str, out_video: str, width: int = 1080, height:
         input_video,
         "-vf",
         vf,
-        "-c:v",
-        "libx264",
-        "-preset",
-        "fast",
+        *x264_args(profile),
         "-c:a",
         "aac",
         out_video,
     ]
-    subprocess.check_call(cmd)
+    run_encode(cmd, profile, media_seconds=probe_duration(input_video), out_path=out_video)
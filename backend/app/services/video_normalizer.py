@@ -1,10 +1,12 @@
-import subprocess
 import os
+from typing import Dict
 from imageio_ffmpeg import get_ffmpeg_exe
 
+from .encoding_profiles import x264_args, run_encode, probe_duration
 
-def normalize_video(in_path: str, out_path: str, fps: int = 30):
-    """Normalize video to H.264, given fps. Uses imageio-ffmpeg's binary if system ffmpeg missing."""
+
+def normalize_video(in_path: str, out_path: str, fps: int = 30, profile: Dict = None):
+    """Normalize video to H.264, given fps and encoding `profile`. Uses imageio-ffmpeg's binary if system ffmpeg missing."""
     os.makedirs(os.path.dirname(out_path), exist_ok=True)
     ffmpeg = get_ffmpeg_exe()
     cmd = [
@@ -14,10 +16,7 @@ def normalize_video(in_path: str, out_path: str, fps: int = 30):
         in_path,
         "-r",
         str(fps),
-        "-c:v",
-        "libx264",
-        "-preset",
-        "fast",
+        *x264_args(profile),
         out_path,
     ]
-    subprocess.check_call(cmd)
+    run_encode(cmd, profile, media_seconds=probe_duration(in_path), out_path=out_path)
@@ -0,0 +1,143 @@
+import argparse
+import json
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+
+from .services.job_queue import JobQueue, DEFAULT_QUEUE_PATH, LEASE_SECONDS
+from .services.pipeline import run_full_pipeline, render_full_clip
+from .services.cancellation import JobCancelled, cancel_scope
+
+
+def _run_process(payload: dict, will_retry: bool):
+    job_id = payload["job_id"]
+    run_full_pipeline(
+        payload["video_url"],
+        job_id,
+        full_render=payload.get("full_render", False),
+        encoding_profile=payload.get("encoding_profile"),
+        latency_slo=payload.get("latency_slo"),
+        will_retry=will_retry,
+    )
+    # the pipeline records failures in its status file rather than raising
+    status_path = os.path.join("storage", "transcripts", f"{job_id}_status.json")
+    with open(status_path, "r", encoding="utf-8") as f:
+        status = json.load(f)
+    if status.get("status") in ("error", "retrying"):
+        raise RuntimeError(status.get("error", "pipeline failed"))
+
+
+def _run_render_clip(payload: dict, will_retry: bool):
+    entry = render_full_clip(
+        payload["video_id"],
+        payload["clip_id"],
+        encoding_profile=payload.get("encoding_profile"),
+        latency_slo=payload.get("latency_slo"),
+        will_retry=will_retry,
+    )
+    if entry.get("render") != "full":
+        raise RuntimeError(entry.get("render_error", "render failed"))
+
+
+# job kind -> handler(payload, will_retry); a handler raising marks the attempt
+# failed. will_retry tells it whether a failure is final, so it can report a
+# retry rather than a terminal error to the UI.
+HANDLERS = {
+    "process": _run_process,
+    "render_clip": _run_render_clip,
+}
+
+
+def run_job(queue: JobQueue, job: dict, worker_id: str):
+    """Run one claimed job, heartbeating its lease until the handler returns.
+
+    If the lease can't be renewed (another worker owns the job, or heartbeats
+    keep failing until the lease is about to lapse) the job is cancelled: its
+    running ffmpeg/yt-dlp process is killed and no further files are written.
+    """
+    done = threading.Event()
+    lost = threading.Event()
+    interval = queue.lease_seconds / 3.0
+
+    def _heartbeat():
+        last_ok = time.monotonic()
+        wait = interval
+        while not done.wait(wait):
+            try:
+                if not queue.heartbeat(job["id"], worker_id):
+                    print(f"[{worker_id}] lost lease on job {job['id']}")
+                    lost.set()
+                    return
+                last_ok = time.monotonic()
+                wait = interval
+            except Exception:
+                # e.g. sqlite3.OperationalError on a lock timeout: retry soon,
+                # but give the job up before the lease can lapse
+                traceback.print_exc()
+                if time.monotonic() - last_ok >= queue.lease_seconds - interval:
+                    print(f"[{worker_id}] cannot renew lease on job {job['id']}, cancelling")
+                    lost.set()
+                    return
+                wait = min(interval, 1.0)
+
+    hb = threading.Thread(target=_heartbeat, daemon=True)
+    hb.start()
+    try:
+        handler = HANDLERS.get(job["kind"])
+        if handler is None:
+            raise ValueError(f"unknown job kind: {job['kind']}")
+        with cancel_scope(lost):
+            handler(job["payload"], job["attempts"] < job["max_attempts"])
+        if lost.is_set():
+            print(f"[{worker_id}] job {job['id']} finished after losing its lease; not marking done")
+        else:
+            queue.complete(job["id"], worker_id)
+    except JobCancelled:
+        print(f"[{worker_id}] job {job['id']} cancelled after losing its lease")
+    except Exception as e:
+        traceback.print_exc()
+        if not lost.is_set():
+            status = queue.fail(job["id"], worker_id, str(e))
+            print(f"[{worker_id}] job {job['id']} failed (attempt {job['attempts']}), now {status}")
+    finally:
+        done.set()
+        hb.join()
+
+
+def run_worker(queue: JobQueue, worker_id: str = None, poll_interval: float = 1.0,
+               stop: threading.Event = None):
+    """Claim and run jobs from `queue` one at a time until `stop` is set."""
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        job = queue.claim(worker_id)
+        if job is None:
+            stop.wait(poll_interval)
+            continue
+        print(f"[{worker_id}] running {job['kind']} job {job['id']} (attempt {job['attempts']})")
+        t0 = time.monotonic()
+        run_job(queue, job, worker_id)
+        print(f"[{worker_id}] job {job['id']} finished in {time.monotonic() - t0:.1f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a pipeline worker against the shared job queue.")
+    parser.add_argument("--queue", default=DEFAULT_QUEUE_PATH, help="path to the SQLite queue file")
+    parser.add_argument("--worker-id", default=None)
+    parser.add_argument("--poll-interval", type=float, default=1.0)
+    parser.add_argument("--lease", type=float, default=LEASE_SECONDS, help="lease length in seconds")
+    args = parser.parse_args(argv)
+
+    queue = JobQueue(args.queue, lease_seconds=args.lease)
+    try:
+        run_worker(queue, worker_id=args.worker_id, poll_interval=args.poll_interval)
+    except KeyboardInterrupt:
+        # the lease simply expires and another worker picks the job up
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -152,45 +152,30 @@ document.addEventListener('DOMContentLoaded', () => {
         preview.classList.remove('has-thumb');
       }
 
+      let shownDrafts = 0;
       const poll = setInterval(async () => {
         try {
           const s = await fetch(`/status/${jobId}`);
           if (!s.ok) return;
           const st = await s.json();
-          result.textContent = `Job ${jobId} — ${st.status}`;
+          result.textContent = st.status === 'retrying'
+            ? `Job ${jobId} — retrying after error: ${st.error || 'unknown'}`
+            : `Job ${jobId} — ${st.status}`;
           if (st.thumbnail) {
             preview.classList.add('has-thumb');
             // Fit preview to actual thumbnail dimensions by loading it in-browser
             fitPreviewToImageUrl(st.thumbnail);
           }
+          if (st.status === 'rendering_drafts' && st.clips_count !== shownDrafts) {
+            // drafts are listed as soon as each one is rendered
+            shownDrafts = st.clips_count;
+            await renderClips(jobId);
+          }
           if (st.status === 'finished' || st.status === 'error') {
             clearInterval(poll);
             if (st.status === 'finished') {
               result.textContent = `Job ${jobId} — finished (${st.clips_count || 0} clips)`;
-              // fetch clips list
-              const c = await fetch(`/clips/${jobId}`);
-              if (c.ok) {
-                const cj = await c.json();
-                if (cj.clips && cj.clips.length) {
-                  clipsEl.innerHTML = '';
-                  cj.clips.forEach(cl => {
-                    const wrapper = document.createElement('div');
-                    wrapper.className = 'clip';
-                    const vid = document.createElement('video');
-                    vid.controls = true;
-                    vid.src = cl.url;
-                    vid.width = 320;
-                    wrapper.appendChild(vid);
-                    const meta = document.createElement('div');
-                    meta.className = 'clip-meta';
-                    meta.textContent = cl.meta && cl.meta.start ? `start: ${cl.meta.start}s` : '';
-                    wrapper.appendChild(meta);
-                    clipsEl.appendChild(wrapper);
-                  });
-                } else {
-                  clipsEl.textContent = 'No clips produced.';
-                }
-              }
+              await renderClips(jobId);
             } else {
               result.textContent = `Job ${jobId} — error`; 
             }
@@ -204,6 +189,106 @@ document.addEventListener('DOMContentLoaded', () => {
     }
   });
   
+  async function renderClips(jobId) {
+    // fetch clips list; new clips get a card, existing cards are updated in
+    // place (a playing video is only reloaded when its url changed)
+    const c = await fetch(`/clips/${jobId}`);
+    if (!c.ok) return;
+    const cj = await c.json();
+    if (!cj.clips || !cj.clips.length) {
+      if (!clipsEl.querySelector('.clip')) clipsEl.textContent = 'No clips produced.';
+      return;
+    }
+    if (!clipsEl.querySelector('.clip')) clipsEl.innerHTML = '';
+    cj.clips.forEach(cl => {
+      let wrapper = clipsEl.querySelector(`.clip[data-clip-id="${cl.id}"]`);
+      if (!wrapper) {
+        wrapper = document.createElement('div');
+        wrapper.className = 'clip';
+        wrapper.dataset.clipId = cl.id;
+        const vid = document.createElement('video');
+        vid.controls = true;
+        vid.width = 320;
+        wrapper.appendChild(vid);
+        const meta = document.createElement('div');
+        meta.className = 'clip-meta';
+        wrapper.appendChild(meta);
+        clipsEl.appendChild(wrapper);
+      }
+      updateClipCard(jobId, wrapper, cl);
+    });
+  }
+
+  function updateClipCard(jobId, wrapper, cl) {
+    const vid = wrapper.querySelector('video');
+    if ((cl.url || '') !== (wrapper.dataset.url || '')) {
+      wrapper.dataset.url = cl.url || '';
+      // no url when the draft render failed; the full render can still be requested
+      if (cl.url) vid.src = cl.url;
+      else vid.removeAttribute('src');
+    }
+    const start = cl.meta && cl.meta.start ? `start: ${cl.meta.start}s` : '';
+    wrapper.querySelector('.clip-meta').textContent = cl.quality === 'draft' ? `${start} (draft)`
+      : cl.quality === 'none' ? `${start} (no preview)` : start;
+
+    let btn = wrapper.querySelector('button');
+    if (cl.render === 'full' || (cl.quality !== 'draft' && cl.quality !== 'none')) {
+      if (btn) btn.remove();
+      return;
+    }
+    if (!btn) {
+      btn = document.createElement('button');
+      btn.type = 'button';
+      btn.addEventListener('click', () => renderFullClip(jobId, cl.id, wrapper));
+      wrapper.appendChild(btn);
+    }
+    if (cl.render === 'queued' || cl.render === 'rendering') {
+      // render already requested (e.g. before a page refresh): just follow it
+      btn.disabled = true;
+      btn.textContent = 'Rendering…';
+      if (!wrapper.dataset.polling) pollFullClip(jobId, cl.id, wrapper);
+    } else {
+      btn.disabled = false;
+      btn.textContent = cl.render === 'error' ? 'Retry full render' : 'Keep (render full quality)';
+    }
+  }
+
+  async function renderFullClip(jobId, clipId, wrapper) {
+    const btn = wrapper.querySelector('button');
+    btn.disabled = true;
+    btn.textContent = 'Rendering…';
+    try {
+      const r = await fetch(`/clips/${jobId}/${clipId}/render`, { method: 'POST' });
+      if (!r.ok) throw new Error(`HTTP ${r.status}`);
+    } catch (err) {
+      console.error(err);
+      btn.disabled = false;
+      btn.textContent = 'Retry full render';
+      return;
+    }
+    if (!wrapper.dataset.polling) pollFullClip(jobId, clipId, wrapper);
+  }
+
+  function pollFullClip(jobId, clipId, wrapper) {
+    wrapper.dataset.polling = '1';
+    const poll = setInterval(async () => {
+      try {
+        const c = await fetch(`/clips/${jobId}`);
+        if (!c.ok) return;
+        const cj = await c.json();
+        const cl = (cj.clips || []).find(x => x.id === clipId);
+        if (!cl) return;
+        if (cl.quality === 'full' || cl.render === 'full' || cl.render === 'error') {
+          clearInterval(poll);
+          delete wrapper.dataset.polling;
+        }
+        updateClipCard(jobId, wrapper, cl);
+      } catch (err) {
+        console.error(err);
+      }
+    }, 2000);
+  }
+
   function getProviderThumbnail(url) {
     try {
       // YouTube id
@@ -11,7 +11,8 @@ def main():
     url = sys.argv[1] if len(sys.argv) > 1 else "https://www.youtube.com/watch?v=aqz-KE-bpKQ"
     job_id = str(uuid.uuid4())
     print("Starting pipeline for", url)
-    run_full_pipeline(url, job_id)
+    # no API here to request full renders of kept drafts, so render every clip in full
+    run_full_pipeline(url, job_id, full_render=True)
     print("Finished pipeline. job_id=", job_id)
 
 
@@ -0,0 +1,12 @@
+import os
+import sys
+
+# storage/ and the queue are resolved from the repo root, same as the API
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, "backend")
+
+from app.worker import main
+
+
+if __name__ == "__main__":
+    main()